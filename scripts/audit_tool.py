@@ -17,10 +17,21 @@ import sys
 import re
 import json
 import csv
+import contextlib
+import functools
+import hashlib
+import mmap
 import subprocess
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+try:
+    # Optional: a much faster JSON encoder and decoder. The stdlib json module is used otherwise.
+    import orjson
+except ImportError:
+    orjson = None
+
 # =============================================================================
 # Security & Quality Audit Tool for genteel
 # =============================================================================
@@ -50,104 +61,402 @@ else:
 REPORT_DIR = "audit_reports"
 FINDINGS_JSON = os.path.join(REPORT_DIR, "findings.json")
 RISK_CSV = os.path.join(REPORT_DIR, "RISK_REGISTER.csv")
+SCAN_CACHE = os.path.join(REPORT_DIR, ".scan_cache.json")
+
+# Files at least this large are memory-mapped rather than read into a buffer.
+# Below it a single read() is cheaper and lets the keyword prefilter run.
+MMAP_THRESHOLD = 1024 * 1024
+
+# Findings are stored column-wise, one list per field, rather than as one dict
+# per finding. Rows are only materialised when the reports are written.
+FINDING_FIELDS = ("title", "severity", "description", "file", "line", "timestamp")
+findings = {field: [] for field in FINDING_FIELDS}
 
-findings = []
+# An audit is a single point in time, so every finding shares one timestamp.
+# run_audit() refreshes it when a run starts.
+AUDIT_TIMESTAMP = datetime.now().isoformat()
 
 # Pre-compiled regex patterns at global scope for performance.
 # Note: String concatenation is used for some patterns (e.g., Private Key) to prevent this script from detecting itself as a false positive.
-SECRET_PATTERN_COMBINED = re.compile(
-    r"(?i)(?P<Generic_Secret>secret\s*[:=]\s*['\"])|"
-    r"(?P<API_Key>api[_-]?key\s*[:=]\s*['\"])|"
-    r"(?P<Password>password\s*[:=]\s*['\"])|"
-    r"(?P<AWS_Key>AKIA[0-9A-Z]{16})|"
-    # Split string to avoid self-flagging (the pattern itself matches the source code string otherwise)
-    r"(?P<Private_Key>-----BEGIN .* PRIVATE " + r"KEY-----)|"
-    r"(?P<Generic_Token>token\s*=\s*['\"][a-zA-Z0-9]{20,}['\"])"
+# Each secret is a (group name, regex) pair; the group name doubles as the finding name.
+# All secrets are matched case-insensitively.
+SECRET_PATTERN_SOURCES = (
+    ("Generic_Secret", r"secret\s*[:=]\s*['\"]"),
+    ("API_Key", r"api[_-]?key\s*[:=]\s*['\"]"),
+    ("Password", r"password\s*[:=]\s*['\"]"),
+    ("AWS_Key", r"AKIA[0-9A-Z]{16}"),
+    # Split string to avoid self-flagging (the pattern itself matches the source code string otherwise).
+    # The PEM label is restricted to letters, digits and spaces so that the
+    # header cannot run on over a TODO or unsafe marker later on the line.
+    ("Private_Key", r"-----BEGIN [A-Z0-9 ]* PRIVATE " + r"KEY-----"),
+    ("Generic_Token", r"token\s*=\s*['\"][a-zA-Z0-9]{20,}['\"]"),
 )
+_SECRET_ALTERNATION = "|".join(f"(?P<{name}>{source})" for name, source in SECRET_PATTERN_SOURCES)
+
+# Sources are scanned as bytes, so the str patterns use ASCII semantics too:
+# \s and case folding then agree with the bytes patterns below.
+SECRET_PATTERN_COMBINED = re.compile("(?i)" + _SECRET_ALTERNATION, re.ASCII)
+
+TODO_PATTERN = re.compile(r"(TODO|FIXME|XXX):", re.ASCII)
+UNSAFE_PATTERN = re.compile(r"unsafe\s*\{", re.ASCII)
+
+# (rank, title, severity, description) for each named group of AUDIT_PATTERN.
+# The rank keeps the historical per-line order: secrets, then debt, then unsafe.
+MARKER_FINDINGS = {
+    "Technical_Debt": (1, "Technical Debt", "Low", "Unresolved TODO/FIXME/XXX tag"),
+    "Unsafe_Code": (2, "Unsafe Code", "Medium", "Manual audit required for unsafe block"),
+}
+FINDING_KINDS = {
+    name: (0, f"Potential Secret: {label}", "Critical", f"Found pattern matching {label}")
+    for name, label in ((name, name.replace("_", " ")) for name, _ in SECRET_PATTERN_SOURCES)
+}
+FINDING_KINDS.update(MARKER_FINDINGS)
+
+# Files larger than this are skipped with a warning. Tracked sources anywhere
+# near this size are generated or vendored, and would dominate the scan time.
+MAX_SCAN_BYTES = 2 * 1024 * 1024
+
+# Only files with these extensions are scanned.
+SCANNED_SUFFIXES = frozenset({".rs", ".py", ".md", ".sh", ".toml"})
+
+# Leading bytes inspected to decide whether a file is binary.
+BINARY_SNIFF_BYTES = 512
+# Every byte except control characters other than common whitespace. Bytes
+# >= 0x80 count as text so that UTF-8 documents are not mistaken for binaries.
+_TEXT_BYTES = bytes(b for b in range(256) if (b >= 32 and b != 0x7f) or b in b"\t\n\r\f\b")
+
+# Literals at least one of which appears in any text the patterns can match.
+# Files containing none of them skip the regex passes entirely. The markers
+# are case-sensitive, so they are checked on the raw buffer; only the secret
+# keywords need the lowercased copy.
+MARKER_KEYWORDS = (b"TODO:", b"FIXME:", b"XXX:", b"unsafe")
+SECRET_KEYWORDS = (b"secret", b"api", b"password", b"akia", b"private " + b"key", b"token")
 
-TODO_PATTERN = re.compile(r"(TODO|FIXME|XXX):")
-UNSAFE_PATTERN = re.compile(r"unsafe\s*\{")
+def _whole_file(pattern):
+    # Narrow `\s` to non-newline whitespace so that a match over a whole file
+    # can never span two lines, as it could not when scanning line by line.
+    # All patterns are ASCII, so they are compiled as bytes patterns and run
+    # on the raw file contents without decoding.
+    return re.compile(pattern.replace(r"\s", r"[^\S\n]").encode())
+
+# Every check fused into one alternation, so that the scanner makes a single
+# finditer() pass per file. Matches of one alternation never overlap, so a
+# marker that starts inside a secret (e.g. the AWS key run in
+# "AKIA012345678901FIXME:") is hidden from the fused pass; _scan_buffer()
+# looks for those with MARKER_PATTERN over the rest of the secret's line.
+#
+# The re engine tries an alternation branch by branch at every offset and has
+# no multi-literal prefilter, so the leading lookahead on the bytes any branch
+# can start with lets it reject most offsets with a single set lookup. It must
+# list the first character of every alternative (both cases for the secrets).
+AUDIT_PATTERN = _whole_file(
+    r"(?=[-SsAaPpTtFXu])(?:"
+    f"(?i:{_SECRET_ALTERNATION})"
+    f"|(?P<Technical_Debt>{TODO_PATTERN.pattern})"
+    f"|(?P<Unsafe_Code>{UNSAFE_PATTERN.pattern})"
+    ")"
+)
+MARKER_PATTERN = _whole_file(
+    f"(?P<Technical_Debt>{TODO_PATTERN.pattern})"
+    f"|(?P<Unsafe_Code>{UNSAFE_PATTERN.pattern})"
+)
 
 def add_finding(title, severity, description, file_path, line_number=None):
-    findings.append({
-        "title": title,
-        "severity": severity,
-        "description": description,
-        "file": file_path,
-        "line": line_number,
-        "timestamp": datetime.now().isoformat()
-    })
+    row = (title, severity, description, file_path, line_number, AUDIT_TIMESTAMP)
+    for column, value in zip(findings.values(), row):
+        column.append(value)
 
+@contextlib.contextmanager
+def atomic_open(path, mode='w', **kwargs):
+    """
+    Opens a temporary file next to `path` and renames it over `path` once the
+    block completes, so a crash or error mid-write never leaves a truncated
+    report or cache behind. The rename is atomic and needs no fsync.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+def write_json(path, data, pretty=False):
+    """Writes `data` to `path` as compact JSON (indented if `pretty`), using orjson when available."""
+    if orjson is not None:
+        with atomic_open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        with atomic_open(path, 'w') as f:
+            if pretty:
+                json.dump(data, f, indent=2)
+            else:
+                json.dump(data, f, separators=(",", ":"))
+
+@functools.lru_cache(maxsize=None)
 def get_tracked_files():
+    """
+    Returns an ordered dict mapping each tracked source file (see
+    SCANNED_SUFFIXES) to its git blob id.
+
+    The blob id is None for unmerged files and when git is unavailable.
+    """
     try:
-        # Run git ls-files to get all tracked files
-        out = subprocess.check_output(["git", "ls-files"], stderr=subprocess.STDOUT).decode("utf-8")
-        files = out.splitlines()
-        # Filter out target directories and audit reports
-        return [f for f in files if not f.startswith("audit_reports/") and "/target/" not in f and not f.startswith("target/")]
-    except Exception:
-        # Fallback to manual scan if git fails
-        files = []
-        for root, _, filenames in os.walk("."):
-            if ".git" in root or "target" in root or "audit_reports" in root:
+        # Each entry reads "<mode> <blob> <stage>\t<path>".
+        files = {}
+        for entry in _iter_git_ls_files():
+            meta, _, f = entry.partition("\t")
+            if os.path.splitext(f)[1] not in SCANNED_SUFFIXES:
+                continue
+            # Filter out target directories and audit reports
+            if f.startswith("audit_reports/") or "/target/" in f or f.startswith("target/"):
                 continue
-            for f in filenames:
-                if f.endswith((".rs", ".py", ".md", ".sh", ".toml")):
-                    files.append(os.path.relpath(os.path.join(root, f), "."))
+            _, blob, stage = meta.split()
+            files[f] = blob if stage == "0" else None
         return files
+    except Exception:
+        # Fallback to manual scan if git fails
+        return dict.fromkeys(_walk_source_files("."))
 
-def scan_text_patterns():
-    files = get_tracked_files()
+def _iter_git_ls_files(chunk_size=64 * 1024):
+    """
+    Streams the NUL-delimited entries of `git ls-files -s -z` as they arrive.
 
-    for f in files:
-        if not os.path.exists(f) or os.path.isdir(f):
-            continue
-        if not f.endswith((".rs", ".py", ".md", ".sh", ".toml")):
+    Entries are split off the pipe chunk by chunk, so the full listing is
+    never held as one string. Raises CalledProcessError if git fails.
+    """
+    cmd = ["git", "ls-files", "-s", "-z"]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+        pending = b""
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            *entries, pending = (pending + chunk).split(b"\0")
+            for entry in entries:
+                yield entry.decode("utf-8")
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+def _modified_files():
+    """Returns the tracked files whose working copy differs from the index."""
+    try:
+        out = subprocess.check_output(["git", "ls-files", "-m", "-z"], stderr=subprocess.DEVNULL).decode("utf-8")
+    except (subprocess.CalledProcessError, OSError):
+        return set()
+    return set(out.split("\0")) - {""}
+
+def _scan_cache_version():
+    # Any change to this script may change what gets reported, so cached
+    # results are only reused by the exact same version of it.
+    with open(os.path.abspath(__file__), 'rb') as fp:
+        return hashlib.sha1(fp.read()).hexdigest()
+
+def _load_scan_cache():
+    """Returns the cached {blob id: [[title, severity, description, line], ...]} map."""
+    try:
+        with open(SCAN_CACHE, 'rb') as fp:
+            data = fp.read()
+        cache = orjson.loads(data) if orjson is not None else json.loads(data)
+        if cache.get("version") == _scan_cache_version():
+            return cache["blobs"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+def _save_scan_cache(blobs):
+    cache = {"version": _scan_cache_version(), "blobs": blobs}
+    if orjson is not None:
+        data = orjson.dumps(cache)
+    else:
+        data = json.dumps(cache, separators=(",", ":")).encode('utf-8')
+    try:
+        with atomic_open(SCAN_CACHE, 'wb') as fp:
+            fp.write(data)
+    except OSError:
+        pass
+
+def _walk_source_files(path):
+    """
+    Recursively yields source files under `path`, skipping build and VCS dirs.
+
+    os.scandir() hands back the entry type from the directory listing itself,
+    so unlike os.walk() no extra stat() is needed per entry on most platforms.
+    Unreadable directories are skipped, as os.walk() does by default.
+    """
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in (".git", "target", "audit_reports"):
+                    continue
+                yield from _walk_source_files(entry.path)
+            elif os.path.splitext(entry.name)[1] in SCANNED_SUFFIXES:
+                yield os.path.relpath(entry.path, ".")
+
+def _iter_matches(pattern, data):
+    """
+    Yields (line_number, match) for every match of `pattern` in `data`.
+
+    The line counter is advanced incrementally between hits, so the cost of
+    counting newlines is only paid up to the last match.
+    """
+    line_number = 1
+    last = 0
+    for match in pattern.finditer(data):
+        # Slice rather than count(start, end): mmap has no count(). The slices
+        # add up to at most one copy of the file.
+        line_number += data[last:match.start()].count(b"\n")
+        last = match.start()
+        yield line_number, match
+
+def _looks_binary(head):
+    """Returns True if the leading bytes of a file look like binary data."""
+    if b"\x00" in head:
+        return True
+    # Deleting the text bytes (in C) leaves just the control bytes to count.
+    return len(head.translate(None, _TEXT_BYTES)) > len(head) * 0.3
+
+def _has_keywords(data):
+    # bytes.__contains__ is a memchr-based search; far cheaper than a regex pass.
+    if any(keyword in data for keyword in MARKER_KEYWORDS):
+        return True
+    lowered = data.lower()
+    return any(keyword in lowered for keyword in SECRET_KEYWORDS)
+
+def _scan_buffer(data):
+    """
+    Scans a bytes-like buffer and returns a list of
+    (line_number, rank, title, severity, description) hits.
+    """
+    hits = []
+    seen_markers = set()
+
+    def add_marker(kind, line_number):
+        # Technical Debt and Unsafe Code are reported at most once per line
+        if (kind, line_number) not in seen_markers:
+            seen_markers.add((kind, line_number))
+            hits.append((line_number, *FINDING_KINDS[kind]))
+
+    for line_number, match in _iter_matches(AUDIT_PATTERN, data):
+        kind = match.lastgroup
+        if kind in MARKER_FINDINGS:
+            add_marker(kind, line_number)
             continue
+        hits.append((line_number, *FINDING_KINDS[kind]))
+
+        # Pick up markers that start inside the secret; the fused pass
+        # resumes after it. Markers never span lines, so stop at the newline.
+        line_end = data.find(b"\n", match.end())
+        if line_end == -1:
+            line_end = len(data)
+        for marker in MARKER_PATTERN.finditer(data, match.start() + 1, line_end):
+            if marker.start() >= match.end():
+                break
+            add_marker(marker.lastgroup, line_number)
+    return hits
 
+def _scan_one(f):
+    """
+    Scans a single file and returns its findings as a list of
+    (title, severity, description, file, line) tuples, or None if the file
+    was skipped or could not be read. None results are never cached, so a
+    skipped file is reported again on every run.
+
+    This runs in a worker process, so it must not touch the global `findings`
+    table; the parent merges the returned lists in file order.
+    """
+    hits = []
+    try:
+        with open(f, 'rb') as fp:
+            size = os.fstat(fp.fileno()).st_size
+            if size > MAX_SCAN_BYTES:
+                print(f"Warning: skipping {f} ({size} bytes, limit is {MAX_SCAN_BYTES})")
+                return None
+
+            # Skip binary files before reading the rest of them
+            head = fp.read(BINARY_SNIFF_BYTES)
+            if _looks_binary(head):
+                return None
+
+            if size < MMAP_THRESHOLD:
+                data = head + fp.read()
+                if _has_keywords(data):
+                    hits = _scan_buffer(data)
+            else:
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    hits = _scan_buffer(mm)
+    except (FileNotFoundError, IsADirectoryError):
+        # Deleted from the working tree, or a submodule checkout; open()
+        # already did the stat, so don't pay for another one up front.
+        return None
+    except Exception as e:
+        print(f"Error scanning {f}: {e}")
+        return None
+
+    hits.sort(key=lambda hit: hit[:2])
+    return [
+        (title, severity, description, f, line_number)
+        for line_number, _, title, severity, description in hits
+    ]
+
+def scan_text_patterns():
+    tracked = get_tracked_files()
+    files = []
+    for f in tracked:
         # Skip this script and the benchmark script as they contain the patterns themselves
         if f.endswith("audit_tool.py") or f.endswith("benchmark_audit_regex.py") or f.endswith("test_audit_regex_performance.py"):
             continue
 
-        try:
-            with open(f, 'r', encoding='utf-8', errors='ignore') as fp:
-                for i, line_content in enumerate(fp):
-                    # Secrets
-                    for match in SECRET_PATTERN_COMBINED.finditer(line_content):
-                        name = match.lastgroup.replace("_", " ")
-                        add_finding(
-                            title=f"Potential Secret: {name}",
-                            severity="Critical",
-                            description=f"Found pattern matching {name}",
-                            file_path=f,
-                            line_number=i+1
-                        )
-                    
-                    # Technical Debt
-                    if TODO_PATTERN.search(line_content):
-                        add_finding(
-                            title="Technical Debt",
-                            severity="Low",
-                            description="Unresolved TODO/FIXME/XXX tag",
-                            file_path=f,
-                            line_number=i+1
-                        )
-
-                    # Unsafe Code
-                    if UNSAFE_PATTERN.search(line_content):
-                        add_finding(
-                            title="Unsafe Code",
-                            severity="Medium",
-                            description="Manual audit required for unsafe block",
-                            file_path=f,
-                            line_number=i+1
-                        )
-        except Exception as e:
-            print(f"Error scanning {f}: {e}")
+        files.append(f)
+
+    # Findings depend only on file contents, so they are cached per git blob
+    # and unchanged files are not even opened on a re-run. Files whose working
+    # copy differs from the index have no blob id for their current contents.
+    modified = _modified_files()
+    blobs = {f: tracked[f] for f in files if tracked[f] is not None and f not in modified}
+    cache = _load_scan_cache()
+
+    results = {}
+    for f, blob in blobs.items():
+        if blob in cache:
+            results[f] = [(title, severity, description, f, line) for title, severity, description, line in cache[blob]]
+
+    # Files are independent and scanning is bound by the regex engine, so fan
+    # the work out across all cores.
+    pending = [f for f in files if f not in results]
+    if pending:
+        # The default worker count is the CPU count, capped where the platform
+        # requires it (61 on Windows).
+        with ProcessPoolExecutor() as executor:
+            results.update(zip(pending, executor.map(_scan_one, pending, chunksize=32)))
+
+    # Merge in file order, keeping report IDs stable
+    new_cache = {}
+    for f in files:
+        rows = results[f]
+        if rows is None:
+            # Skipped or unreadable: left out of the cache so that the file
+            # is retried, and any warning repeated, on the next run.
+            continue
+        for row in rows:
+            add_finding(*row)
+        if f in blobs:
+            new_cache[blobs[f]] = [(title, severity, description, line) for title, severity, description, _, line in rows]
+    _save_scan_cache(new_cache)
 
 def run_audit():
+    global AUDIT_TIMESTAMP
+    AUDIT_TIMESTAMP = datetime.now().isoformat()
+
     parser = argparse.ArgumentParser(description="Security & Quality Audit Tool for genteel")
-    parser.parse_args()
+    parser.add_argument("--pretty", action="store_true", help="Indent findings.json for human reading")
+    args = parser.parse_args()
 
     # Ensure we are in root
     if not os.path.exists("Cargo.toml"):
@@ -162,25 +471,22 @@ def run_audit():
 
     scan_text_patterns()
     
+    finding_count = len(findings["title"])
+
     # Save Findings (JSON)
-    with open(FINDINGS_JSON, 'w') as f:
-        json.dump(findings, f, indent=2)
+    write_json(FINDINGS_JSON, [dict(zip(FINDING_FIELDS, row)) for row in zip(*findings.values())], pretty=args.pretty)
     
     # Save Risk Register (CSV)
-    with open(RISK_CSV, 'w', newline='') as f:
+    with atomic_open(RISK_CSV, 'w', newline='') as f:
         writer = csv.writer(f)
         writer.writerow(["ID", "Title", "Severity", "File", "Line", "Status"])
-        for i, finding in enumerate(findings):
-            writer.writerow([
-                f"AUDIT-{i+1:03}",
-                finding["title"],
-                finding["severity"],
-                finding["file"],
-                finding.get("line", "N/A"),
-                "Open"
-            ])
-
-    print(f"✅ Audit complete! Found {len(findings)} issues.")
+        rows = zip(findings["title"], findings["severity"], findings["file"], findings["line"])
+        writer.writerows(
+            (f"AUDIT-{i:03}", title, severity, file_path, line_number, "Open")
+            for i, (title, severity, file_path, line_number) in enumerate(rows, start=1)
+        )
+
+    print(f"✅ Audit complete! Found {finding_count} issues.")
     print(f"📄 Reports available in {REPORT_DIR}/")
 
 if __name__ == "__main__":
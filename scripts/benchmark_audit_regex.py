@@ -3,6 +3,7 @@ import re
 import os
 import sys
 import random
+import mmap
 import string
 
 # Ensure we can import audit_tool from the scripts directory
@@ -14,46 +15,59 @@ import audit_tool
 FILENAME = "benchmark_data.txt"
 FILE_SIZE_MB = 50
 
-def generate_data():
-    print(f"[*] Generating {FILE_SIZE_MB}MB test file...")
+def generate_data(filename=FILENAME, size_mb=FILE_SIZE_MB, seed=None):
+    print(f"[*] Generating {size_mb}MB test file: {filename}...")
     chunk_size = 1024 * 1024 # 1MB
-    chars = string.ascii_letters + string.digits + " \n\t"
-
-    with open(FILENAME, "w", encoding="utf-8") as f:
-        for _ in range(FILE_SIZE_MB):
+    chars = (string.ascii_letters + string.digits + " \n\t").encode("ascii")
+    # Maps every byte value onto the charset, so a chunk of random bytes can
+    # be turned into random text in one C-level pass instead of one
+    # random.choices() pick per character.
+    charset_table = bytes(chars[i % len(chars)] for i in range(256))
+    key_chars = (string.ascii_uppercase + string.digits).encode("ascii")
+    key_table = bytes(key_chars[i % len(key_chars)] for i in range(256))
+    # Pass a seed to get the same file, and so the same match counts, every run.
+    rng = random.Random(seed)
+
+    with open(filename, "wb") as f:
+        for _ in range(size_mb):
             # Generate 1MB of random data
-            chunk = "".join(random.choices(chars, k=chunk_size))
+            chunk = rng.randbytes(chunk_size).translate(charset_table)
 
             # Inject patterns occasionally
-            if random.random() < 0.5:
-                chunk += "\nAK" + "IA" + "".join(random.choices(string.ascii_uppercase + string.digits, k=16)) + "\n"
-            if random.random() < 0.5:
-                chunk += "\n-----BEGIN OPENSSH " + "PRIVATE " + "KEY-----\n"
-            if random.random() < 0.5:
-                chunk += "\nun" + "safe {\n"
-            if random.random() < 0.5:
-                chunk += "\n" + "TO" + "DO: fix this\n"
+            if rng.random() < 0.5:
+                chunk += b"\nAK" + b"IA" + rng.randbytes(16).translate(key_table) + b"\n"
+            if rng.random() < 0.5:
+                chunk += b"\n-----BEGIN OPENSSH " + b"PRIVATE " + b"KEY-----\n"
+            if rng.random() < 0.5:
+                chunk += b"\nun" + b"safe {\n"
+            if rng.random() < 0.5:
+                chunk += b"\n" + b"TO" + b"DO: fix this\n"
 
             f.write(chunk)
     print("[*] Generation complete.")
 
-def scan_slow():
+def scan_slow(filename=FILENAME):
     print("[*] Running slow scan (re.search inside loop)...")
     # In slow scan, we recreate the old behavior of individual re.search calls
-    # We include more patterns from audit_tool to match behavior
+    # We include more patterns from audit_tool to match behavior; like the
+    # audit tool, every secret is matched case-insensitively
     slow_secret_patterns = {
         "Generic Secret": r"(?i)secret\s*[:=]\s*['\"]",
         "API Key": r"(?i)api[_-]?key\s*[:=]\s*['\"]",
         "Password": r"(?i)password\s*[:=]\s*['\"]",
-        "AWS Key": r"AKIA[0-9A-Z]{16}",
-        "Private Key": r"-----BEGIN .* PRIVATE " + r"KEY-----",
-        "Generic Token": r"token\s*=\s*['\"][a-zA-Z0-9]{20,}['\"]"
+        "AWS Key": r"(?i)AKIA[0-9A-Z]{16}",
+        "Private Key": r"(?i)-----BEGIN .* PRIVATE " + r"KEY-----",
+        "Generic Token": r"(?i)token\s*=\s*['\"][a-zA-Z0-9]{20,}['\"]"
     }
 
+    # Start from an empty re module cache, so the slow path pays for
+    # compiling its patterns whatever ran earlier in the process.
+    re.purge()
+
     match_count = 0
     start_time = time.time()
 
-    with open(FILENAME, 'r', encoding='utf-8', errors='ignore') as fp:
+    with open(filename, 'r', encoding='utf-8', errors='ignore') as fp:
         for i, line_content in enumerate(fp):
             # Secrets
             for name, pattern in slow_secret_patterns.items():
@@ -71,44 +85,58 @@ def scan_slow():
     end_time = time.time()
     duration = end_time - start_time
     print(f"[*] Slow scan took {duration:.4f} seconds. Matches: {match_count}")
-    return duration
+    return duration, match_count
 
-def scan_fast():
-    print("[*] Running fast scan (pre-compiled regex)...")
+def scan_fast(filename=FILENAME):
+    print("[*] Running fast scan (one fused pre-compiled regex per line)...")
 
     match_count = 0
     start_time = time.time()
 
-    with open(FILENAME, 'r', encoding='utf-8', errors='ignore') as fp:
+    # Secrets, unsafe blocks and task markers are alternatives of one
+    # pattern, so each line costs a single finditer() call. Bind it once so
+    # the loop does not look up the module attribute and method per line.
+    finditer = audit_tool.AUDIT_PATTERN.finditer
+    with open(filename, 'rb') as fp:
         for i, line_content in enumerate(fp):
-            # Secrets
-            for match in audit_tool.SECRET_PATTERN_COMBINED.finditer(line_content):
+            for match in finditer(line_content):
                 match_count += 1
 
-            # Unsafe
-            if audit_tool.UNSAFE_PATTERN.search(line_content):
-                match_count += 1
+    end_time = time.time()
+    duration = end_time - start_time
+    print(f"[*] Fast scan took {duration:.4f} seconds. Matches: {match_count}")
+    return duration, match_count
 
-            # tracker
-            if audit_tool.TODO_PATTERN.search(line_content):
+def scan_fused(filename=FILENAME):
+    print("[*] Running fused scan (one alternation over the mmapped file)...")
+
+    match_count = 0
+    start_time = time.time()
+
+    # This is what audit_tool.scan_text_patterns does per file: a single
+    # finditer() over the whole buffer, with no per-line Python loop.
+    with open(filename, 'rb') as fp:
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for match in audit_tool.AUDIT_PATTERN.finditer(mm):
                 match_count += 1
 
     end_time = time.time()
     duration = end_time - start_time
-    print(f"[*] Fast scan took {duration:.4f} seconds. Matches: {match_count}")
-    return duration
+    print(f"[*] Fused scan took {duration:.4f} seconds. Matches: {match_count}")
+    return duration, match_count
 
 if __name__ == "__main__":
     if not os.path.exists(FILENAME):
         generate_data()
 
-    t_slow = scan_slow()
-    t_fast = scan_fast()
+    t_slow, _ = scan_slow()
+    t_fast, _ = scan_fast()
+    t_fused, _ = scan_fused()
 
     print(f"\nResults:")
-    print(f"Slow: {t_slow:.4f}s")
-    print(f"Fast: {t_fast:.4f}s")
-    print(f"Improvement: {(t_slow - t_fast) / t_slow * 100:.2f}%")
+    print(f"Slow:  {t_slow:.4f}s")
+    print(f"Fast:  {t_fast:.4f}s ({(t_slow - t_fast) / t_slow * 100:.2f}% faster than slow)")
+    print(f"Fused: {t_fused:.4f}s ({(t_slow - t_fused) / t_slow * 100:.2f}% faster than slow, {t_fast / t_fused:.1f}x fast)")
 
     # Clean up
     if os.path.exists(FILENAME):
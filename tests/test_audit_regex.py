@@ -2,6 +2,7 @@ import unittest
 import sys
 import os
 import re
+import time
 
 # Add parent directory and scripts directory to path to allow importing audit_tool
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -23,6 +24,12 @@ class TestAuditRegex(unittest.TestCase):
         self.assertIsInstance(audit_tool.TODO_PATTERN, re.Pattern)
         self.assertIsInstance(audit_tool.UNSAFE_PATTERN, re.Pattern)
 
+    def test_patterns_are_ascii(self):
+        """The str patterns must behave like the bytes patterns used for scanning."""
+        for pattern in (audit_tool.SECRET_PATTERN_COMBINED, audit_tool.TODO_PATTERN, audit_tool.UNSAFE_PATTERN):
+            self.assertTrue(pattern.flags & re.ASCII, pattern.pattern)
+        self.assertIsNone(audit_tool.UNSAFE_PATTERN.search("un" + "safe\u00a0{"))
+
     def test_aws_key_match(self):
         pattern = audit_tool.SECRET_PATTERN_COMBINED
         match = pattern.search("AKIA" + "IOSFODNN7EXAMPLE")
@@ -30,6 +37,23 @@ class TestAuditRegex(unittest.TestCase):
         self.assertEqual(match.lastgroup, "AWS_Key")
         self.assertIsNone(pattern.search("AKIA" + "IOSFODNN7EXAMPL")) # Too short
 
+    def test_aws_key_is_case_insensitive(self):
+        match = audit_tool.SECRET_PATTERN_COMBINED.search("akia" + "iosfodnn7example")
+        self.assertIsNotNone(match)
+        self.assertEqual(match.lastgroup, "AWS_Key")
+        match = audit_tool.AUDIT_PATTERN.search(b"akia" + b"iosfodnn7example")
+        self.assertIsNotNone(match)
+        self.assertEqual(match.lastgroup, "AWS_Key")
+
+    def test_generic_token_is_case_insensitive(self):
+        for text in ('TOKEN = ' + '"abcdefghijklmnopqrstuvwx"', 'AUTH_TOKEN = ' + '"abcdefghijklmnopqrstuv"'):
+            match = audit_tool.SECRET_PATTERN_COMBINED.search(text)
+            self.assertIsNotNone(match, text)
+            self.assertEqual(match.lastgroup, "Generic_Token")
+            match = audit_tool.AUDIT_PATTERN.search(text.encode())
+            self.assertIsNotNone(match, text)
+            self.assertEqual(match.lastgroup, "Generic_Token")
+
     def test_private_key_match(self):
         pattern = audit_tool.SECRET_PATTERN_COMBINED
         match = pattern.search("-----BEGIN RSA PRIVATE " + "KEY-----")
@@ -68,5 +92,53 @@ class TestAuditRegex(unittest.TestCase):
         self.assertTrue(pattern.search("FIX" + "ME: broken"))
         self.assertTrue(pattern.search("X" + "XX: critical"))
 
+    def test_fused_pattern_match(self):
+        """The fused whole-file pattern finds every check."""
+        pattern = audit_tool.AUDIT_PATTERN
+        samples = {
+            "Generic_Secret": "Sec" + "ret = '",
+            "API_Key": "Api_" + "key=" + "'12345'",
+            "Password": "PASS" + "WORD: '12345'",
+            "AWS_Key": "AKIA" + "IOSFODNN7EXAMPLE",
+            "Private_Key": "-----BEGIN RSA PRIVATE " + "KEY-----",
+            "Generic_Token": "token=" + '"abcdefghijklmnopqrstuvwxyz0123456789"',
+            "Technical_Debt": "FIX" + "ME: broken",
+            "Unsafe_Code": "un" + "safe {",
+        }
+        for group, sample in samples.items():
+            match = pattern.search(("x " + sample).encode())
+            self.assertIsNotNone(match, group)
+            self.assertEqual(match.lastgroup, group)
+
+    def test_no_catastrophic_backtracking(self):
+        """Adversarial near-misses must scan in roughly linear time."""
+        adversarial = [
+            "-----BEGIN " * 20000,
+            "-----BEGIN " + "A " * 50000,
+            "token=" + '"' + "a" * 100000,
+            "secret" + " " * 100000,
+            "api_" + "key" + "\t" * 100000 + "=",
+            "AKIA" * 25000,
+        ]
+        for text in adversarial:
+            for pattern, data in ((audit_tool.SECRET_PATTERN_COMBINED, text),
+                                  (audit_tool.AUDIT_PATTERN, text.encode())):
+                start = time.perf_counter()
+                list(pattern.finditer(data))
+                elapsed = time.perf_counter() - start
+                self.assertLess(elapsed, 1.0, f"{text[:20]!r}... took {elapsed:.2f}s")
+
+    def test_marker_inside_secret_is_reported(self):
+        """A marker starting inside a secret match must still be found, as separate searches would."""
+        cases = {
+            b"AK" + b"IA012345678901FIX" + b"ME: x": ["Potential Secret: AWS Key", "Technical Debt"],
+            b"AK" + b"IA0123456789un" + b"safe {": ["Potential Secret: AWS Key", "Unsafe Code"],
+            b"AK" + b"IA012345678901TO" + b"DO: TO" + b"DO: again": ["Potential Secret: AWS Key", "Technical Debt"],
+        }
+        for data, titles in cases.items():
+            hits = audit_tool._scan_buffer(data)
+            self.assertEqual([hit[2] for hit in hits], titles, data)
+            self.assertTrue(all(hit[0] == 1 for hit in hits))
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,118 +1,81 @@
-import time
-import re
 import sys
 import os
-import random
-import string
+import shutil
+import tempfile
 import unittest
 
-# Ensure we can import audit_tool from the scripts directory
+# The data generator and the scans live in the benchmark script; the test
+# runs them on a small file and checks that they agree.
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(project_root, 'scripts'))
+from benchmark_audit_regex import generate_data, scan_slow, scan_fast, scan_fused
 import audit_tool
 
-def generate_data(filename, size_mb):
-    print(f"[*] Generating {size_mb}MB test file: {filename}...")
-    chunk_size = 1024 * 1024 # 1MB
-    chars = string.ascii_letters + string.digits + " \n\t"
-
-    with open(filename, "w", encoding="utf-8") as f:
-        for _ in range(size_mb):
-            # Generate 1MB of random data
-            chunk = "".join(random.choices(chars, k=chunk_size))
-
-            # Inject patterns occasionally
-            if random.random() < 0.5:
-                chunk += "\nAK" + "IA" + "".join(random.choices(string.ascii_uppercase + string.digits, k=16)) + "\n"
-            if random.random() < 0.5:
-                chunk += "\n-----BEGIN OPENSSH " + "PRIVATE KEY-----\n"
-            if random.random() < 0.5:
-                chunk += "\nun" + "safe {\n"
-            if random.random() < 0.5:
-                chunk += "\n" + "TO" + "DO: fix this\n"
-
-            f.write(chunk)
-    print("[*] Generation complete.")
-
-def scan_slow(filename):
-    print("[*] Running slow scan (re.search inside loop)...")
-
-    # In slow scan, we recreate the old uncompiled dictionary behavior
-    slow_secret_patterns = {
-        "Generic Secret": r"(?i)secret\s*[:=]\s*['\"]",
-        "API Key": r"(?i)api[_-]?key\s*[:=]\s*['\"]",
-        "Password": r"(?i)password\s*[:=]\s*['\"]",
-        "AWS Key": r"AKIA[0-9A-Z]{16}",
-        "Private Key": r"-----BEGIN .* PRIVATE " + r"KEY-----",
-        "Generic Token": r"token\s*=\s*['\"][a-zA-Z0-9]{20,}['\"]"
-    }
-
-    match_count = 0
-    start_time = time.time()
-
-    with open(filename, 'r', encoding='utf-8', errors='ignore') as fp:
-        for i, line_content in enumerate(fp):
-            # Secrets
-            for name, pattern in slow_secret_patterns.items():
-                if re.search(pattern, line_content):
-                    match_count += 1
-
-            # Unsafe
-            if re.search(audit_tool.UNSAFE_PATTERN.pattern, line_content):
-                match_count += 1
-
-            # Task markers
-            if re.search(audit_tool.TODO_PATTERN.pattern, line_content):
-                match_count += 1
-
-    end_time = time.time()
-    duration = end_time - start_time
-    print(f"[*] Slow scan took {duration:.4f} seconds. Matches: {match_count}")
-    return duration, match_count
-
-def scan_fast(filename):
-    print("[*] Running fast scan (pre-compiled regex)...")
-
-    match_count = 0
-    start_time = time.time()
-
-    with open(filename, 'r', encoding='utf-8', errors='ignore') as fp:
-        for i, line_content in enumerate(fp):
-            # Secrets
-            for match in audit_tool.SECRET_PATTERN_COMBINED.finditer(line_content):
-                match_count += 1
-
-            # Unsafe
-            if audit_tool.UNSAFE_PATTERN.search(line_content):
-                match_count += 1
-
-            # Task markers
-            if audit_tool.TODO_PATTERN.search(line_content):
-                match_count += 1
-
-    end_time = time.time()
-    duration = end_time - start_time
-    print(f"[*] Fast scan took {duration:.4f} seconds. Matches: {match_count}")
-    return duration, match_count
+# One line per alternative of the audit pattern, keyed by the group it must
+# hit, appended to the random data so that every branch is exercised
+# whatever the generator injected.
+NEEDLES = [
+    ("Generic_Secret", "secret = " + "'"),
+    ("API_Key", "api_" + "key: " + '"'),
+    ("Password", "pass" + "word=" + "'"),
+    ("AWS_Key", "AK" + "IA" + "IOSFODNN7EXAMPLE"),
+    ("Private_Key", "-----BEGIN RSA PRIVATE " + "KEY-----"),
+    ("Generic_Token", "token = " + '"abcdefghijklmnopqrstuvwxyz"'),
+    ("Technical_Debt", "TO" + "DO: fix this"),
+    ("Technical_Debt", "FIX" + "ME: broken"),
+    ("Technical_Debt", "X" + "XX: critical"),
+    ("Unsafe_Code", "un" + "safe {"),
+]
+NEEDLE_TEXT = "\n" + "\n".join(line for _, line in NEEDLES) + "\n"
 
 class TestAuditRegexPerformance(unittest.TestCase):
-    def test_regex_performance(self):
-        filename = "test_data_small.txt"
-        generate_data(filename, 1) # 1MB
-
-        try:
-            duration_slow, matches_slow = scan_slow(filename)
-            duration_fast, matches_fast = scan_fast(filename)
-
-            # Assert correctness
-            self.assertEqual(matches_fast, matches_slow, "Fast scan matches should equal slow scan matches")
-
-            # Performance check (informative)
-            print(f"\n[Test Result] Slow: {duration_slow:.4f}s, Fast: {duration_fast:.4f}s")
-
-        finally:
-            if os.path.exists(filename):
-                os.remove(filename)
+    @classmethod
+    def setUpClass(cls):
+        # Generate the data and run the slow reference scan once; every
+        # faster scan is checked against the same file.
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.filename = os.path.join(cls.tmpdir, "test_data_small.txt")
+        generate_data(cls.filename, 1, seed=42) # 1MB
+        with open(cls.filename, "a", encoding="ascii") as f:
+            f.write(NEEDLE_TEXT)
+        cls.needles_file = os.path.join(cls.tmpdir, "needles.txt")
+        with open(cls.needles_file, "w", encoding="ascii") as f:
+            f.write(NEEDLE_TEXT)
+        cls.duration_slow, cls.matches_slow = scan_slow(cls.filename)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def test_every_needle_hits_its_group(self):
+        for group, line in NEEDLES:
+            match = audit_tool.AUDIT_PATTERN.search(line.encode("ascii"))
+            self.assertIsNotNone(match, line)
+            self.assertEqual(match.lastgroup, group, line)
+        self.assertEqual({group for group, _ in NEEDLES}, set(audit_tool.AUDIT_PATTERN.groupindex))
+
+    def test_scans_count_each_needle_once(self):
+        for scan in (scan_slow, scan_fast, scan_fused):
+            _, matches = scan(self.needles_file)
+            self.assertEqual(matches, len(NEEDLES), scan.__name__)
+
+    def test_fast_scan(self):
+        duration_fast, matches_fast = scan_fast(self.filename)
+
+        # Assert correctness
+        self.assertEqual(matches_fast, self.matches_slow, "Fast scan matches should equal slow scan matches")
+
+        # Performance check (informative)
+        print(f"\n[Test Result] Slow: {self.duration_slow:.4f}s, Fast: {duration_fast:.4f}s")
+
+    def test_fused_scan(self):
+        duration_fused, matches_fused = scan_fused(self.filename)
+
+        # Assert correctness
+        self.assertEqual(matches_fused, self.matches_slow, "Fused scan matches should equal slow scan matches")
+
+        # Performance check (informative)
+        print(f"\n[Test Result] Slow: {self.duration_slow:.4f}s, Fused: {duration_fused:.4f}s")
 
 if __name__ == "__main__":
     # When run directly, perform the full benchmark
@@ -123,12 +86,14 @@ if __name__ == "__main__":
 
         t_slow, m_slow = scan_slow(BENCHMARK_FILE)
         t_fast, m_fast = scan_fast(BENCHMARK_FILE)
+        t_fused, m_fused = scan_fused(BENCHMARK_FILE)
 
         print(f"\nResults:")
-        print(f"Slow: {t_slow:.4f}s")
-        print(f"Fast: {t_fast:.4f}s")
+        print(f"Slow:  {t_slow:.4f}s")
+        print(f"Fast:  {t_fast:.4f}s")
+        print(f"Fused: {t_fused:.4f}s")
         if t_slow > 0:
-            print(f"Improvement: {(t_slow - t_fast) / t_slow * 100:.2f}%")
+            print(f"Improvement: {(t_slow - t_fast) / t_slow * 100:.2f}% (fast), {(t_slow - t_fused) / t_slow * 100:.2f}% (fused)")
 
     finally:
         if os.path.exists(BENCHMARK_FILE):
@@ -0,0 +1,152 @@
+import unittest
+import sys
+import os
+import shutil
+import io
+import json
+import tempfile
+from contextlib import redirect_stdout
+from unittest import mock
+
+# Add parent directory and scripts directory to path to allow importing audit_tool
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'scripts'))
+
+import audit_tool
+
+class TestAuditScanner(unittest.TestCase):
+    """Tests for the file walking, scanning and caching in audit_tool.py."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_walk_skips_unreadable_directories(self):
+        self.write("ok/a.rs", b"")
+        self.write("locked/b.rs", b"")
+        locked = os.path.join(self.tmpdir, "locked")
+        real_scandir = os.scandir
+
+        def scandir(path):
+            if path == locked:
+                raise PermissionError(13, "Permission denied", path)
+            return real_scandir(path)
+
+        with mock.patch.object(audit_tool.os, "scandir", side_effect=scandir):
+            files = [os.path.basename(f) for f in audit_tool._walk_source_files(self.tmpdir)]
+        self.assertEqual(files, ["a.rs"])
+
+    def run_scan(self, tracked, modified=()):
+        """Runs scan_text_patterns() over `tracked` ({path: blob}) and returns the findings rows."""
+        for column in audit_tool.findings.values():
+            column.clear()
+        with mock.patch.object(audit_tool, "get_tracked_files", return_value=tracked), \
+             mock.patch.object(audit_tool, "_modified_files", return_value=set(modified)), \
+             mock.patch.object(audit_tool, "SCAN_CACHE", self.cache_path):
+            audit_tool.scan_text_patterns()
+        return list(zip(audit_tool.findings["title"], audit_tool.findings["file"], audit_tool.findings["line"]))
+
+    @property
+    def cache_path(self):
+        return os.path.join(self.tmpdir, "scan_cache.json")
+
+    def load_cache(self):
+        with mock.patch.object(audit_tool, "SCAN_CACHE", self.cache_path):
+            return audit_tool._load_scan_cache()
+
+    def test_skipped_file_is_not_cached(self):
+        big = self.write("big.md", b"TO" + b"DO: x\n" + b"a" * audit_tool.MAX_SCAN_BYTES)
+        binary = self.write("blob.rs", b"\x00" * 600)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertIsNone(audit_tool._scan_one(big))
+            self.assertIsNone(audit_tool._scan_one(binary))
+        self.assertIn("Warning: skipping", out.getvalue())
+
+        self.assertEqual(self.run_scan({big: "b1", binary: "b2"}), [])
+        self.assertEqual(self.load_cache(), {})
+
+    def test_iter_matches_line_numbers(self):
+        data = b"a\nTO" + b"DO: x\n\n\nun" + b"safe {\nb"
+        lines = [line for line, _ in audit_tool._iter_matches(audit_tool.AUDIT_PATTERN, data)]
+        self.assertEqual(lines, [2, 5])
+
+    def test_scan_buffer_multiple_hits_per_line(self):
+        data = b"pass" + b"word = 'x'; TO" + b"DO: a FIX" + b"ME: b un" + b"safe { un" + b"safe {\n"
+        titles = [hit[2] for hit in audit_tool._scan_buffer(data)]
+        # Every secret is reported; each marker kind only once per line
+        self.assertEqual(titles, ["Potential Secret: Password", "Technical Debt", "Unsafe Code"])
+
+    def test_scan_buffer_crlf(self):
+        data = b"one\r\nTO" + b"DO: x\r\n\r\nun" + b"safe\r\n{\r\nun" + b"safe\t{\r\n"
+        hits = [(hit[0], hit[2]) for hit in audit_tool._scan_buffer(data)]
+        # A marker split across lines is not a match, as when scanning line by line
+        self.assertEqual(hits, [(2, "Technical Debt"), (6, "Unsafe Code")])
+
+    def test_looks_binary(self):
+        self.assertFalse(audit_tool._looks_binary(b"fn main() {}\n\tok\r\n"))
+        self.assertFalse(audit_tool._looks_binary("// caf\u00e9 \u2603\n".encode("utf-8")))
+        self.assertTrue(audit_tool._looks_binary(b"text\x00more"))
+        self.assertTrue(audit_tool._looks_binary(bytes(range(1, 32)) * 4))
+        self.assertFalse(audit_tool._looks_binary(b""))
+
+    def test_scan_one_sorts_by_line_then_kind(self):
+        path = self.write("a.rs", b"un" + b"safe { } // TO" + b"DO: x\nok\napi_" + b"key = '1'\n")
+        rows = audit_tool._scan_one(path)
+        self.assertEqual([(row[0], row[4]) for row in rows], [
+            ("Technical Debt", 1), ("Unsafe Code", 1), ("Potential Secret: API Key", 3)])
+        self.assertTrue(all(row[3] == path for row in rows))
+
+    def test_scan_one_mmap_matches_read(self):
+        data = (b"x" * 100 + b"\n") * 50 + b"TO" + b"DO: x\n" + b"AK" + b"IA" + b"A" * 16 + b"\n"
+        path = self.write("a.md", data)
+        read_rows = audit_tool._scan_one(path)
+        with mock.patch.object(audit_tool, "MMAP_THRESHOLD", 0):
+            self.assertEqual(audit_tool._scan_one(path), read_rows)
+        self.assertEqual([row[4] for row in read_rows], [51, 52])
+
+    def test_scan_one_missing_file(self):
+        self.assertIsNone(audit_tool._scan_one(os.path.join(self.tmpdir, "gone.rs")))
+
+    def test_scan_cache_round_trip(self):
+        blobs = {"b1": [["Technical Debt", "Low", "Unresolved TODO/FIXME/XXX tag", 3]]}
+        with mock.patch.object(audit_tool, "SCAN_CACHE", self.cache_path):
+            audit_tool._save_scan_cache(blobs)
+        self.assertEqual(self.load_cache(), blobs)
+
+    def test_scan_cache_version_mismatch(self):
+        with open(self.cache_path, "w") as f:
+            json.dump({"version": "stale", "blobs": {"b1": []}}, f)
+        self.assertEqual(self.load_cache(), {})
+        with open(self.cache_path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(self.load_cache(), {})
+
+    def test_scan_cache_hit_and_modified_rescan(self):
+        path = self.write("a.rs", b"TO" + b"DO: x\n")
+        self.assertEqual(self.run_scan({path: "b1"}), [("Technical Debt", path, 1)])
+        self.assertIn("b1", self.load_cache())
+
+        # Same blob id: served from the cache without reading the file
+        self.write("a.rs", b"\nun" + b"safe {\n")
+        self.assertEqual(self.run_scan({path: "b1"}), [("Technical Debt", path, 1)])
+
+        # Listed by `git ls-files -m`: rescanned, and its stale entry dropped
+        self.assertEqual(self.run_scan({path: "b1"}, modified={path}), [("Unsafe Code", path, 2)])
+        self.assertNotIn("b1", self.load_cache())
+
+        # No blob id (unmerged, or git unavailable): always rescanned
+        self.assertEqual(self.run_scan({path: None}), [("Unsafe Code", path, 2)])
+
+if __name__ == '__main__':
+    unittest.main()